@@ -28,7 +28,7 @@ import shlex
 import socket
 import multiprocessing
 import subprocess
-from ambari_commons.shell import shellRunner
+import threading
 import time
 import uuid
 import json
@@ -39,13 +39,15 @@ from ambari_commons.os_family_impl import OsFamilyImpl
 
 log = logging.getLogger()
 
+cached_facter = None
 
-def run_os_command(cmd):
-  shell = (type(cmd) == str)
+
+def run_os_command(cmd, stdin=None):
+  if isinstance(cmd, basestring):
+    cmd = shlex.split(cmd)
   process = subprocess.Popen(cmd,
-                             shell=shell,
                              stdout=subprocess.PIPE,
-                             stdin=subprocess.PIPE,
+                             stdin=stdin,
                              stderr=subprocess.PIPE
   )
   (stdoutdata, stderrdata) = process.communicate()
@@ -53,12 +55,24 @@ def run_os_command(cmd):
 
 
 class Facter(object):
+  # Seconds during which the collected memory and uptime data is reused by facterInfo()
+  VOLATILE_DATA_TTL = 1.0
+  GET_LSCPU_CMD = ["lscpu"]
+  KB_TO_GB = 1.0 / (1024.0 * 1024.0)
+  MB_TO_GB = 1.0 / 1024.0
+
   def __init__(self, config):
     """
     Initialize the configs, which can be provided if using multiple Agents per host.
     :param config: Agent configs. None if will use the default location.
     """
     self.config = config if config is not None else self.resolve_ambari_config()
+    self.mac_address = None
+    self.kernel_release = platform.release()
+    # OSCheck parses the release files on every call, so the results are kept for the Facter lifetime
+    self.os_type = OSCheck.get_os_type()
+    self.os_version = OSCheck.get_os_version()
+    self.os_family = OSCheck.get_os_family()
 
   def resolve_ambari_config(self):
     """
@@ -91,7 +105,7 @@ class Facter(object):
   # Returns the host's primary DNS domain name
   def getDomain(self):
     fqdn = self.getFqdn()
-    hostname = self.getHostname()
+    hostname = fqdn.split('.', 1)[0]
     domain = fqdn.replace(hostname, "", 1)
     domain = domain.replace(".", "", 1)
     return domain
@@ -104,21 +118,25 @@ class Facter(object):
   def getArchitecture(self):
     result = platform.processor()
     if not result:
-      retcode, out, err = run_os_command("lscpu | grep Architecture: | awk '{ print $2 }'")
-      out = out.strip()
-      if out:
-        return out
+      try:
+        retcode, out, err = run_os_command(Facter.GET_LSCPU_CMD)
+        for line in out.splitlines():
+          key, _, value = line.partition(':')
+          if key == 'Architecture' and value.strip():
+            return value.split()[0]
+      except OSError:
+        log.warn("Could not run {0}".format(" ".join(Facter.GET_LSCPU_CMD)))
       return 'unknown cpu arch'
     else:
       return result
 
   # Returns the full name of the OS
   def getOperatingSystem(self):
-    return OSCheck.get_os_type()
+    return self.os_type
 
   # Returns the OS version
   def getOperatingSystemRelease(self):
-    return OSCheck.get_os_version()
+    return self.os_version
 
   # Returns the OS TimeZone
   def getTimeZone(self):
@@ -131,38 +149,41 @@ class Facter(object):
 
   # Returns the Kernel release
   def getKernelRelease(self):
-    return platform.release()
+    return self.kernel_release
 
 
   # Returns the Kernel release version
   def getKernelVersion(self):
-    kernel_release = platform.release()
-    return kernel_release.split('-', 1)[0]
+    return self.kernel_release.split('-', 1)[0]
 
   # Returns the major kernel release version
   def getKernelMajVersion(self):
     return '.'.join(self.getKernelVersion().split('.', 2)[0:2])
 
+  # Returns the MAC address, uuid.getnode() may scan all the interfaces so it is called only once
   def getMacAddress(self):
-    mac = uuid.getnode()
-    if uuid.getnode() == mac:
-      mac = ':'.join('%02X' % ((mac >> 8 * i) & 0xff) for i in reversed(xrange(6)))
-    else:
-      mac = 'UNKNOWN'
-    return mac
+    if self.mac_address is None:
+      mac = '%012X' % uuid.getnode()
+      self.mac_address = ':'.join(mac[i:i + 2] for i in range(0, 12, 2))
+    return self.mac_address
 
   # Returns the operating system family
 
   def getOsFamily(self):
-    return OSCheck.get_os_family()
+    return self.os_family
 
   # Return uptime hours
   def getUptimeHours(self):
-    return self.getUptimeSeconds() / (60 * 60)
+    return self.getUptime()[1]
 
   # Return uptime days
   def getUptimeDays(self):
-    return self.getUptimeSeconds() / (60 * 60 * 24)
+    return self.getUptime()[2]
+
+  # Return uptime seconds, hours and days from a single getUptimeSeconds() call
+  def getUptime(self):
+    uptime_seconds = self.getUptimeSeconds()
+    return uptime_seconds, uptime_seconds // (60 * 60), uptime_seconds // (60 * 60 * 24)
 
   def getSystemResourceIfExists(self, systemResources, key, default):
     if key in systemResources:
@@ -225,22 +246,37 @@ class Facter(object):
   def getMemoryTotal(self):
     raise NotImplementedError()
 
+  def setVolatileData(self):
+    raise NotImplementedError()
+
+  # Collects again the volatile data if it is older than VOLATILE_DATA_TTL, or if the clock was set back since
+  def refreshVolatileData(self):
+    if not 0 <= time.time() - self.volatile_data_timestamp <= Facter.VOLATILE_DATA_TTL:
+      self.setVolatileData()
+
   def facterInfo(self):
+    self.refreshVolatileData()
+    uptime_seconds, uptime_hours, uptime_days = self.getUptime()
+    # getArchitecture() may run lscpu, so it is called once for the three keys reporting it
+    architecture = self.getArchitecture()
+    processorcount = self.getProcessorcount()
+    # the fqdn is resolved first, getDomain() and getHostname() then reuse the cached value
+    fqdn = self.getFqdn()
     return {
       'id': self.getId(),
       'kernel': self.getKernel(),
       'domain': self.getDomain(),
-      'fqdn': self.getFqdn(),
+      'fqdn': fqdn,
       'hostname': self.getHostname(),
       'macaddress': self.getMacAddress(),
-      'architecture': self.getArchitecture(),
+      'architecture': architecture,
       'operatingsystem': self.getOperatingSystem(),
       'operatingsystemrelease': self.getOperatingSystemRelease(),
-      'physicalprocessorcount': self.getProcessorcount(),
-      'processorcount': self.getProcessorcount(),
+      'physicalprocessorcount': processorcount,
+      'processorcount': processorcount,
       'timezone': self.getTimeZone(),
-      'hardwareisa': self.getArchitecture(),
-      'hardwaremodel': self.getArchitecture(),
+      'hardwareisa': architecture,
+      'hardwaremodel': architecture,
       'kernelrelease': self.getKernelRelease(),
       'kernelversion': self.getKernelVersion(),
       'osfamily': self.getOsFamily(),
@@ -248,9 +284,9 @@ class Facter(object):
       'ipaddress': self.getIpAddress(),
       'netmask': self.getNetmask(),
       'interfaces': self.getInterfaces(),
-      'uptime_seconds': str(self.getUptimeSeconds()),
-      'uptime_hours': str(self.getUptimeHours()),
-      'uptime_days': str(self.getUptimeDays()),
+      'uptime_seconds': str(uptime_seconds),
+      'uptime_hours': str(uptime_hours),
+      'uptime_days': str(uptime_days),
       'memorysize': self.getMemorySize(),
       'memoryfree': self.getMemoryFree(),
       'memorytotal': self.getMemoryTotal()
@@ -259,24 +295,102 @@ class Facter(object):
   #Convert kB to GB
   @staticmethod
   def convertSizeKbToGb(size):
-    return "%0.2f GB" % round(float(size) / (1024.0 * 1024.0), 2)
+    return "%0.2f GB" % round(float(size) * Facter.KB_TO_GB, 2)
 
   #Convert MB to GB
   @staticmethod
   def convertSizeMbToGb(size):
-    return "%0.2f GB" % round(float(size) / (1024.0), 2)
+    return "%0.2f GB" % round(float(size) * Facter.MB_TO_GB, 2)
 
 @OsFamilyImpl(os_family=OSConst.WINSRV_FAMILY)
 class FacterWindows(Facter):
   GET_SYSTEM_INFO_CMD = "systeminfo"
-  GET_MEMORY_CMD = '$mem =(Get-WMIObject Win32_OperatingSystem -ComputerName "LocalHost" ); echo "$($mem.FreePhysicalMemory) $($mem.TotalVisibleMemorySize)"'
-  GET_PAGE_FILE_INFO = '$pgo=(Get-WmiObject Win32_PageFileUsage); echo "$($pgo.AllocatedBaseSize) $($pgo.AllocatedBaseSize-$pgo.CurrentUsage)"'
-  GET_UPTIME_CMD = 'echo $([int]((get-date)-[system.management.managementdatetimeconverter]::todatetime((get-wmiobject -class win32_operatingsystem).Lastbootuptime)).TotalSeconds)'
+  # Prints one "<key>=<value>" line per page file value. The page files are summed, so hosts with none or
+  # several of them still report both values.
+  GET_PAGE_FILE_CMD = '$swapsize=0; $swapused=0; ' \
+                      'foreach ($pgo in @(Get-WmiObject Win32_PageFileUsage)) ' \
+                      '{ $swapsize+=$pgo.AllocatedBaseSize; $swapused+=$pgo.CurrentUsage }; ' \
+                      'echo "swapsize=$swapsize"; ' \
+                      'echo "swapfree=$($swapsize-$swapused)"'
+  # Prints one "<key>=<value>" line per SYSTEM_RESOURCES_KEYS entry with a single PowerShell run
+  GET_SYSTEM_RESOURCES_CMD = '$os=(Get-WmiObject Win32_OperatingSystem); ' + GET_PAGE_FILE_CMD + '; ' \
+                             'echo "memoryfree=$($os.FreePhysicalMemory)"; ' \
+                             'echo "memorytotal=$($os.TotalVisibleMemorySize)"; ' \
+                             'echo "uptime_seconds=$([int]((get-date)-[system.management.managementdatetimeconverter]::todatetime($os.LastBootUpTime)).TotalSeconds)"'
+  SYSTEM_RESOURCES_KEYS = ['memoryfree', 'memorytotal', 'swapsize', 'swapfree', 'uptime_seconds']
 
+  def __init__(self, config):
+    super(FacterWindows, self).__init__(config)
+    self.fqdn = None
+    self.setVolatileData()
+
+  def setVolatileData(self):
+    resources = FacterWindows.setDataSystemResourcesKernel32()
+    if resources:
+      # the page file usage is only exposed by WMI, PowerShell is started for it alone
+      resources.update(FacterWindows.setDataSystemResourcesOutput(FacterWindows.GET_PAGE_FILE_CMD))
+    else:
+      resources = FacterWindows.setDataSystemResourcesOutput(FacterWindows.GET_SYSTEM_RESOURCES_CMD)
+    self.DATA_SYSTEM_RESOURCES_OUTPUT = resources
+    self.volatile_data_timestamp = time.time()
 
-  # Returns the FQDN of the host
+  # Returns the memory and uptime values read with GlobalMemoryStatusEx and GetTickCount64, as strings in the same
+  # units as the PowerShell output: kB for the memory and seconds for the uptime
+  @staticmethod
+  def setDataSystemResourcesKernel32():
+    import ctypes
+
+    class MEMORYSTATUSEX(ctypes.Structure):
+      _fields_ = [("dwLength", ctypes.c_ulong),
+                  ("dwMemoryLoad", ctypes.c_ulong),
+                  ("ullTotalPhys", ctypes.c_ulonglong),
+                  ("ullAvailPhys", ctypes.c_ulonglong),
+                  ("ullTotalPageFile", ctypes.c_ulonglong),
+                  ("ullAvailPageFile", ctypes.c_ulonglong),
+                  ("ullTotalVirtual", ctypes.c_ulonglong),
+                  ("ullAvailVirtual", ctypes.c_ulonglong),
+                  ("ullAvailExtendedVirtual", ctypes.c_ulonglong)]
+
+    try:
+      kernel32 = ctypes.windll.kernel32
+      status = MEMORYSTATUSEX()
+      status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+      if not kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+        log.warn("GlobalMemoryStatusEx failed")
+        return {}
+      kernel32.GetTickCount64.restype = ctypes.c_ulonglong
+      return {
+        'memoryfree': str(status.ullAvailPhys // 1024),
+        'memorytotal': str(status.ullTotalPhys // 1024),
+        'uptime_seconds': str(kernel32.GetTickCount64() // 1000)
+      }
+    except:
+      log.warn("Can not get system resources from kernel32")
+    return {}
+
+  # Runs one of the system resources scripts and returns its values keyed by SYSTEM_RESOURCES_KEYS
+  @staticmethod
+  def setDataSystemResourcesOutput(script_block):
+    from ambari_commons.shell import shellRunner
+    try:
+      runner = shellRunner()
+      output = runner.runPowershell(script_block=script_block).output
+      # every value is parsed on its own, a missing one does not discard the others
+      result = {}
+      for line in output.splitlines():
+        key, _, value = line.strip().partition('=')
+        if key in FacterWindows.SYSTEM_RESOURCES_KEYS and value:
+          result[key] = value
+      return result
+    except:
+      log.warn("Can not get system resources")
+    return {}
+
+  # Returns the FQDN of the host, resolved only once since socket.getfqdn() may be slow
   def getFqdn(self):
-    return socket.getfqdn().lower()
+    if self.fqdn is None:
+      self.fqdn = socket.getfqdn().lower()
+    return self.fqdn
 
   # Return  netmask
   def getNetmask(self):
@@ -291,71 +405,48 @@ class FacterWindows(Facter):
   # Return uptime seconds
   def getUptimeSeconds(self):
     try:
-      runner = shellRunner()
-      result = runner.runPowershell(script_block=FacterWindows.GET_UPTIME_CMD).output.replace('\n', '').replace('\r',
-                                                                                                                '')
-      return int(result)
-    except:
-      log.warn("Can not get SwapFree")
+      return int(self.DATA_SYSTEM_RESOURCES_OUTPUT['uptime_seconds'])
+    except (KeyError, ValueError):
+      log.warn("Can not get Uptime")
     return 0
 
   # Return memoryfree
   def getMemoryFree(self):
     try:
-      runner = shellRunner()
-      result = runner.runPowershell(script_block=FacterWindows.GET_MEMORY_CMD).output.split(" ")[0].replace('\n',
-                                                                                                            '').replace(
-        '\r', '')
-      return result
-    except:
+      return self.DATA_SYSTEM_RESOURCES_OUTPUT['memoryfree']
+    except KeyError:
       log.warn("Can not get MemoryFree")
     return 0
 
   # Return memorytotal
   def getMemoryTotal(self):
     try:
-      runner = shellRunner()
-      result = runner.runPowershell(script_block=FacterWindows.GET_MEMORY_CMD).output.split(" ")[-1].replace('\n',
-                                                                                                             '').replace(
-        '\r', '')
-      return result
-    except:
+      return self.DATA_SYSTEM_RESOURCES_OUTPUT['memorytotal']
+    except KeyError:
       log.warn("Can not get MemoryTotal")
     return 0
 
   # Return swapfree
   def getSwapFree(self):
     try:
-      runner = shellRunner()
-      result = runner.runPowershell(script_block=FacterWindows.GET_PAGE_FILE_INFO).output.split(" ")[-1].replace('\n',
-                                                                                                                 '').replace(
-        '\r', '')
-      return result
-    except:
+      return self.DATA_SYSTEM_RESOURCES_OUTPUT['swapfree']
+    except KeyError:
       log.warn("Can not get SwapFree")
     return 0
 
   # Return swapsize
   def getSwapSize(self):
     try:
-      runner = shellRunner()
-      result = runner.runPowershell(script_block=FacterWindows.GET_PAGE_FILE_INFO).output.split(" ")[0].replace('\n',
-                                                                                                                '').replace(
-        '\r', '')
-      return result
-    except:
-      log.warn("Can not get SwapFree")
+      return self.DATA_SYSTEM_RESOURCES_OUTPUT['swapsize']
+    except KeyError:
+      log.warn("Can not get SwapSize")
     return 0
 
   # Return memorysize
   def getMemorySize(self):
     try:
-      runner = shellRunner()
-      result = runner.runPowershell(script_block=FacterWindows.GET_MEMORY_CMD).output.split(" ")[-1].replace('\n',
-                                                                                                             '').replace(
-        '\r', '')
-      return result
-    except:
+      return self.DATA_SYSTEM_RESOURCES_OUTPUT['memorytotal']
+    except KeyError:
       log.warn("Can not get MemorySize")
     return 0
 
@@ -373,18 +464,69 @@ class FacterWindows(Facter):
 @OsFamilyImpl(os_family=OsFamilyImpl.DEFAULT)
 class FacterLinux(Facter):
   # selinux command
-  GET_SE_LINUX_ST_CMD = "/usr/sbin/sestatus"
+  GET_SE_LINUX_ST_CMD = ["/usr/sbin/sestatus"]
   GET_IFCONFIG_SHORT_CMD = "ifconfig -s"
   GET_IP_LINK_CMD = "ip link"
-  GET_UPTIME_CMD = "cat /proc/uptime"
-  GET_MEMINFO_CMD = "cat /proc/meminfo"
+  SYS_CLASS_NET_DIR = "/sys/class/net"
+  IFF_UP = 0x1
+  PROC_UPTIME_FILE = "/proc/uptime"
+  PROC_MEMINFO_FILE = "/proc/meminfo"
+  # pre-compiled regexps used to parse the collected data
+  SE_LINUX_STATUS_REGEX = re.compile('(enforcing|permissive|enabled)')
+  IP_LINK_IFNAME_LINE_REGEX = re.compile("^\d")
+  UPTIME_SECONDS_REGEX = re.compile("\d+")
 
   def __init__(self, config):
     super(FacterLinux,self).__init__(config)
-    self.DATA_IFCONFIG_SHORT_OUTPUT = FacterLinux.setDataIfConfigShortOutput()
-    self.DATA_IP_LINK_OUTPUT = FacterLinux.setDataIpLinkOutput()
+    self.DATA_SE_LINUX_STATUS = False
+    # The FQDN lookup blocks on DNS, run it while the rest is collected
+    fqdn_probe = threading.Thread(target=self.getFqdn)
+    fqdn_probe.start()
+    self.setVolatileData()
+    self.DATA_IFCONFIG_SHORT_OUTPUT = ""
+    self.DATA_IP_LINK_OUTPUT = ""
+    # Only fork `ifconfig`/`ip` when sysfs could not provide the interfaces list
+    if not self.DATA_SYS_CLASS_NET_OUTPUT:
+      self.DATA_IFCONFIG_SHORT_OUTPUT = FacterLinux.setDataIfConfigShortOutput()
+      if not self.DATA_IFCONFIG_SHORT_OUTPUT.strip():
+        self.DATA_IP_LINK_OUTPUT = FacterLinux.setDataIpLinkOutput()
+    fqdn_probe.join()
+
+  def setVolatileData(self):
+    # SELinux can be toggled and interfaces brought up or down at runtime, so both are refreshed with the rest
+    # of the volatile data. sestatus blocks on a subprocess, run it while sysfs and the /proc files are read
+    se_linux_probe = threading.Thread(target=self.setDataSeLinuxStatus)
+    se_linux_probe.start()
+    self.DATA_SYS_CLASS_NET_OUTPUT = FacterLinux.setDataSysClassNetOutput()
     self.DATA_UPTIME_OUTPUT = FacterLinux.setDataUpTimeOutput()
     self.DATA_MEMINFO_OUTPUT = FacterLinux.setMemInfoOutput()
+    self.DATA_MEMINFO = FacterLinux.parseMemInfoOutput(self.DATA_MEMINFO_OUTPUT)
+    se_linux_probe.join()
+    self.volatile_data_timestamp = time.time()
+
+  # Returns the comma separated list of the up interfaces found in /sys/class/net, as `ifconfig -s` lists them
+  @staticmethod
+  def setDataSysClassNetOutput():
+
+    try:
+      names = sorted(os.listdir(FacterLinux.SYS_CLASS_NET_DIR))
+    except OSError:
+      log.warn("Can't list {0}".format(FacterLinux.SYS_CLASS_NET_DIR))
+      return ""
+
+    interfaces = []
+    for name in names:
+      interface_dir = os.path.join(FacterLinux.SYS_CLASS_NET_DIR, name)
+      # skip the regular files, like bonding_masters
+      if not os.path.isdir(interface_dir):
+        continue
+      try:
+        with open(os.path.join(interface_dir, "flags")) as f:
+          if int(f.read(), 16) & FacterLinux.IFF_UP:
+            interfaces.append(name)
+      except (IOError, ValueError):
+        log.warn("Can't read the flags of {0}".format(name))
+    return ",".join(interfaces)
 
   # Returns the output of `ifconfig -s` command
   @staticmethod
@@ -412,56 +554,63 @@ class FacterLinux(Facter):
   def setDataUpTimeOutput():
 
     try:
-      result = os.popen(FacterLinux.GET_UPTIME_CMD).read()
-      return result
-    except OSError:
-      log.warn("Can't execute {0}".format(FacterLinux.GET_UPTIME_CMD))
+      with open(FacterLinux.PROC_UPTIME_FILE) as f:
+        return f.read()
+    except IOError:
+      log.warn("Can't read {0}".format(FacterLinux.PROC_UPTIME_FILE))
     return ""
 
   @staticmethod
   def setMemInfoOutput():
 
     try:
-      result = os.popen(FacterLinux.GET_MEMINFO_CMD).read()
-      return result
-    except OSError:
-      log.warn("Can't execute {0}".format(FacterLinux.GET_MEMINFO_CMD))
+      with open(FacterLinux.PROC_MEMINFO_FILE) as f:
+        return f.read()
+    except IOError:
+      log.warn("Can't read {0}".format(FacterLinux.PROC_MEMINFO_FILE))
     return ""
 
+  # Returns the /proc/meminfo values (in kB) keyed by field name, parsed in a single pass
+  @staticmethod
+  def parseMemInfoOutput(meminfo_output):
+    meminfo = {}
+    for line in meminfo_output.splitlines():
+      key, _, value = line.partition(':')
+      value = value.split()
+      if value and value[0].isdigit():
+        meminfo[key.strip()] = int(value[0])
+    return meminfo
+
   # Returns the FQDN of the host
   def getFqdn(self):
     return hostname.hostname(self.config)
 
+  def setDataSeLinuxStatus(self):
+    self.DATA_SE_LINUX_STATUS = self.isSeLinux()
+
   def isSeLinux(self):
 
     try:
       retcode, out, err = run_os_command(FacterLinux.GET_SE_LINUX_ST_CMD)
-      se_status = re.search('(enforcing|permissive|enabled)', out)
+      se_status = FacterLinux.SE_LINUX_STATUS_REGEX.search(out)
       if se_status:
         return True
     except OSError:
-      log.warn("Could not run {0}: OK".format(FacterLinux.GET_SE_LINUX_ST_CMD))
+      log.warn("Could not run {0}: OK".format(" ".join(FacterLinux.GET_SE_LINUX_ST_CMD)))
     return False
 
   def return_first_words_from_list(self, list):
-    result = ""
-    for i in list:
-      if i.strip():
-        result = result + i.split()[0].strip() + ","
-
-    result = re.sub(r',$', "", result)
-    return result
+    return ",".join(i.split()[0] for i in list if i.strip())
 
   def return_ifnames_from_ip_link(self, ip_link_output):
     list = []
-    prog = re.compile("^\d")
     for line in ip_link_output.splitlines():
-      if prog.match(line):
+      if FacterLinux.IP_LINK_IFNAME_LINE_REGEX.match(line):
         list.append(line.split()[1].rstrip(":"))
     return ",".join(list)
 
   def data_return_first(self, patern, data):
-    full_list = re.findall(patern, data)
+    full_list = patern.findall(data)
     result = ""
     if full_list:
       result = full_list[0]
@@ -474,20 +623,29 @@ class FacterLinux(Facter):
     import struct
     primary_ip = self.getIpAddress().strip()
 
-    for ifname in self.getInterfaces().split(","):
-      if ifname.strip():
-        ip_address_by_ifname = self.get_ip_address_by_ifname(ifname)
-        if ip_address_by_ifname is not None:
-          if primary_ip == ip_address_by_ifname.strip():
-            return socket.inet_ntoa(fcntl.ioctl(socket.socket(socket.AF_INET, socket.SOCK_DGRAM), 35099, struct.pack('256s', ifname))[20:24])
+    # A single socket serves all the SIOCGIFADDR/SIOCGIFNETMASK requests
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+      for ifname in self.getInterfaces().split(","):
+        if ifname.strip():
+          ip_address_by_ifname = self.get_ip_address_by_ifname(ifname, s)
+          if ip_address_by_ifname is not None:
+            if primary_ip == ip_address_by_ifname.strip():
+              return socket.inet_ntoa(fcntl.ioctl(
+                s.fileno(),
+                0x891b,  # SIOCGIFNETMASK
+                struct.pack('256s', ifname[:15])
+                )[20:24])
+    finally:
+      s.close()
 
     return None
       
   # Return IP by interface name
-  def get_ip_address_by_ifname(self, ifname):
+  def get_ip_address_by_ifname(self, ifname, sock=None):
     import fcntl
     import struct
-    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    s = sock if sock is not None else socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
     ip_address_by_ifname = None
     try:
       ip_address_by_ifname = socket.inet_ntoa(fcntl.ioctl(
@@ -497,12 +655,18 @@ class FacterLinux(Facter):
         )[20:24])
     except Exception, err:
       log.warn("Can't get the IP address for {0}".format(ifname))
+    finally:
+      if sock is None:
+        s.close()
     
     return ip_address_by_ifname
       
 
   # Return interfaces
   def getInterfaces(self):
+    # If /sys/class/net is available, then return that result.
+    if self.DATA_SYS_CLASS_NET_OUTPUT:
+      return self.DATA_SYS_CLASS_NET_OUTPUT
     result = self.return_first_words_from_list(self.DATA_IFCONFIG_SHORT_OUTPUT.splitlines()[1:])
     # If the host has `ifconfig` command, then return that result.
     if result != '':
@@ -518,7 +682,7 @@ class FacterLinux(Facter):
   # Return uptime seconds
   def getUptimeSeconds(self):
     try:
-      return int(self.data_return_first("\d+", self.DATA_UPTIME_OUTPUT))
+      return int(self.data_return_first(FacterLinux.UPTIME_SECONDS_REGEX, self.DATA_UPTIME_OUTPUT))
     except ValueError:
       log.warn("Can't get an uptime value from {0}".format(self.DATA_UPTIME_OUTPUT))
       return 0
@@ -527,16 +691,16 @@ class FacterLinux(Facter):
   def getMemoryFree(self):
     #:memoryfree_mb => "MemFree",
     try:
-      return int(self.data_return_first("MemFree:.*?(\d+) .*", self.DATA_MEMINFO_OUTPUT))
-    except ValueError:
+      return self.DATA_MEMINFO['MemFree']
+    except KeyError:
       log.warn("Can't get free memory size from {0}".format(self.DATA_MEMINFO_OUTPUT))
       return 0
 
   # Return memorytotal
   def getMemoryTotal(self):
     try:
-      return int(self.data_return_first("MemTotal:.*?(\d+) .*", self.DATA_MEMINFO_OUTPUT))
-    except ValueError:
+      return self.DATA_MEMINFO['MemTotal']
+    except KeyError:
       log.warn("Can't get total memory size from {0}".format(self.DATA_MEMINFO_OUTPUT))
       return 0
 
@@ -544,8 +708,8 @@ class FacterLinux(Facter):
   def getSwapFree(self):
     #:swapfree_mb   => "SwapFree"
     try:
-      return int(self.data_return_first("SwapFree:.*?(\d+) .*", self.DATA_MEMINFO_OUTPUT))
-    except ValueError:
+      return self.DATA_MEMINFO['SwapFree']
+    except KeyError:
       log.warn("Can't get free swap memory size from {0}".format(self.DATA_MEMINFO_OUTPUT))
       return 0
 
@@ -553,8 +717,8 @@ class FacterLinux(Facter):
   def getSwapSize(self):
     #:swapsize_mb   => "SwapTotal",
     try:
-      return int(self.data_return_first("SwapTotal:.*?(\d+) .*", self.DATA_MEMINFO_OUTPUT))
-    except ValueError:
+      return self.DATA_MEMINFO['SwapTotal']
+    except KeyError:
       log.warn("Can't get total swap memory size from {0}".format(self.DATA_MEMINFO_OUTPUT))
       return 0
 
@@ -562,8 +726,8 @@ class FacterLinux(Facter):
   def getMemorySize(self):
     #:memorysize_mb => "MemTotal"
     try:
-      return int(self.data_return_first("MemTotal:.*?(\d+) .*", self.DATA_MEMINFO_OUTPUT))
-    except ValueError:
+      return self.DATA_MEMINFO['MemTotal']
+    except KeyError:
       log.warn("Can't get memory size from {0}".format(self.DATA_MEMINFO_OUTPUT))
       return 0
 
@@ -572,7 +736,7 @@ class FacterLinux(Facter):
     systemResourceOverrides = self.getSystemResourceOverrides()
     facterInfo = self.replaceFacterInfoWithSystemResources(systemResourceOverrides, facterInfo)
 
-    facterInfo['selinux'] = self.isSeLinux()
+    facterInfo['selinux'] = self.DATA_SE_LINUX_STATUS
     facterInfo['swapsize'] = Facter.convertSizeKbToGb(
       self.getSystemResourceIfExists(systemResourceOverrides, 'swapsize', self.getSwapSize()))
     facterInfo['swapfree'] = Facter.convertSizeKbToGb(
@@ -580,6 +744,18 @@ class FacterLinux(Facter):
     return facterInfo
 
 
+def get_facter(config):
+  """
+  Returns the Facter shared by the whole agent process, so that the stable host data (interfaces, MAC address,
+  FQDN, SELinux status) is collected only once. Memory and uptime are still refreshed by facterInfo().
+  :param config: Agent configs, only used when the Facter is created.
+  """
+  global cached_facter
+  if cached_facter is None:
+    cached_facter = Facter(config)
+  return cached_facter
+
+
 def main(argv=None):
   config = None
   print Facter(config).facterInfo()
@@ -25,7 +25,7 @@ from resource_management.core import shell
 from resource_management.core.shell import call
 from resource_management.core.exceptions import ExecuteTimeoutException, Fail
 from ambari_commons.shell import shellRunner
-from Facter import Facter
+from Facter import get_facter
 from ambari_commons.os_check import OSConst
 from ambari_commons.os_family_impl import OsFamilyFuncImpl, OsFamilyImpl
 from AmbariConfig import AmbariConfig
@@ -50,7 +50,7 @@ class Hardware:
       'mounts': Hardware.osdisks()
     }
     self.config = config
-    self.hardware.update(Facter(self.config).facterInfo())
+    self.hardware.update(get_facter(self.config).facterInfo())
     logger.info("Host system information: %s", self.hardware)
 
   @classmethod
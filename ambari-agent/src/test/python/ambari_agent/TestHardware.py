@@ -31,8 +31,8 @@ from only_for_platform import not_for_platform, PLATFORM_WINDOWS
 from ambari_agent import hostname
 from ambari_agent.Hardware import Hardware
 from ambari_agent.AmbariConfig import AmbariConfig
-from ambari_agent.Facter import Facter, FacterLinux
-from ambari_commons import OSCheck
+from ambari_agent.Facter import Facter, FacterLinux, FacterWindows, get_facter
+from ambari_commons import OSCheck, OSConst
 from resource_management.core import shell
 
 
@@ -40,6 +40,7 @@ from resource_management.core import shell
 @patch.object(platform, "linux_distribution", new=MagicMock(return_value=('Suse', '11', 'Final')))
 @patch.object(socket, "getfqdn", new=MagicMock(return_value="ambari.apache.org"))
 @patch.object(socket, "gethostbyname", new=MagicMock(return_value="192.168.1.1"))
+@patch.object(FacterLinux, "setDataSysClassNetOutput", new=MagicMock(return_value=''))
 @patch.object(FacterLinux, "setDataIfConfigShortOutput", new=MagicMock(return_value='''Iface   MTU Met    RX-OK RX-ERR RX-DRP RX-OVR    TX-OK TX-ERR TX-DRP TX-OVR Flg
 eth0   1500   0     9986      0      0      0     5490      0      0      0 BMRU
 eth1   1500   0        0      0      0      0        6      0      0      0 BMRU
@@ -56,6 +57,7 @@ class TestHardware(TestCase):
   @patch.object(Hardware, "osdisks", new=MagicMock(return_value=[]))
   @patch.object(Hardware, "_chk_writable_mount", new=MagicMock(return_value=True))
   @patch.object(FacterLinux, "get_ip_address_by_ifname", new=MagicMock(return_value=None))
+  @patch("ambari_agent.Facter.cached_facter", new=None)
   @patch.object(OSCheck, "get_os_type")
   @patch.object(OSCheck, "get_os_version")
   def test_build(self, get_os_version_mock, get_os_type_mock):
@@ -222,6 +224,51 @@ class TestHardware(TestCase):
     self.assertEquals(result['uptime_hours'], '73')
     self.assertEquals(result['uptime_days'], '3')
 
+  @patch.object(FacterLinux, "get_ip_address_by_ifname", new=MagicMock(return_value=None))
+  @patch("ambari_agent.Facter.cached_facter", new=None)
+  @patch("time.time")
+  @patch.object(FacterLinux, "isSeLinux")
+  @patch.object(FacterLinux, "setDataUpTimeOutput")
+  @patch.object(OSCheck, "get_os_type")
+  @patch.object(OSCheck, "get_os_version")
+  def test_facterVolatileDataRefresh(self, get_os_version_mock, get_os_type_mock, facter_setDataUpTimeOutput_mock,
+                                     isSeLinux_mock, time_mock):
+    facter_setDataUpTimeOutput_mock.return_value = "262813.00 123.45"
+    isSeLinux_mock.return_value = False
+    get_os_type_mock.return_value = "suse"
+    get_os_version_mock.return_value = "11"
+    time_mock.return_value = 1000.0
+    config = None
+    facter = get_facter(config)
+
+    self.assertTrue(facter is get_facter(config))
+    self.assertEquals(facter.facterInfo()['uptime_seconds'], '262813')
+    self.assertFalse(facter.facterInfo()['selinux'])
+
+    # the collected data is reused until it gets older than VOLATILE_DATA_TTL
+    facter_setDataUpTimeOutput_mock.return_value = "262823.00 123.45"
+    isSeLinux_mock.return_value = True
+    self.assertEquals(facter.facterInfo()['uptime_seconds'], '262813')
+    self.assertFalse(facter.facterInfo()['selinux'])
+    time_mock.return_value = 1000.0 + Facter.VOLATILE_DATA_TTL + 1
+    self.assertEquals(facter.facterInfo()['uptime_seconds'], '262823')
+    self.assertTrue(facter.facterInfo()['selinux'])
+
+    # the up interfaces listed in sysfs follow the same TTL
+    with patch.object(FacterLinux, "setDataSysClassNetOutput") as setDataSysClassNetOutput_mock:
+      setDataSysClassNetOutput_mock.return_value = "eth0,lo"
+      self.assertEquals(facter.facterInfo()['interfaces'], 'eth0,eth1,eth2,lo')
+      time_mock.return_value = 1000.0 + 2 * (Facter.VOLATILE_DATA_TTL + 1)
+      self.assertEquals(facter.facterInfo()['interfaces'], 'eth0,lo')
+      setDataSysClassNetOutput_mock.return_value = "eth0,eth1,lo"
+      time_mock.return_value = 1000.0 + 3 * (Facter.VOLATILE_DATA_TTL + 1)
+      self.assertEquals(facter.facterInfo()['interfaces'], 'eth0,eth1,lo')
+
+    # the data is collected again when the clock is set back
+    facter_setDataUpTimeOutput_mock.return_value = "262833.00 123.45"
+    time_mock.return_value = 1000.0
+    self.assertEquals(facter.facterInfo()['uptime_seconds'], '262833')
+
   @patch.object(FacterLinux, "get_ip_address_by_ifname", new=MagicMock(return_value=None))
   @patch.object(FacterLinux, "setMemInfoOutput")
   @patch.object(OSCheck, "get_os_type")
@@ -278,6 +325,25 @@ SwapFree:        1598676 kB
     self.assertEquals(result['ipaddress'], '10.0.2.15')
     self.assertEquals(result['netmask'], '255.255.255.0')
     self.assertEquals(result['interfaces'], 'eth0,eth1,eth2,lo')
+    self.assertEquals(1, socket_socket_mock.call_count)
+    self.assertTrue(socket_socket_mock.return_value.close.called)
+
+  @patch.object(FacterLinux, "get_ip_address_by_ifname", new=MagicMock(return_value=None))
+  @patch.object(OSCheck, "get_os_type")
+  @patch.object(OSCheck, "get_os_version")
+  def test_facterDataSysClassNetOutput(self, get_os_version_mock, get_os_type_mock):
+    get_os_type_mock.return_value = "suse"
+    get_os_version_mock.return_value = "11"
+    config = None
+    with patch.object(FacterLinux, "setDataSysClassNetOutput") as setDataSysClassNetOutput_mock, \
+        patch.object(FacterLinux, "setDataIfConfigShortOutput") as setDataIfConfigShortOutput_mock, \
+        patch.object(FacterLinux, "setDataIpLinkOutput") as setDataIpLinkOutput_mock:
+      setDataSysClassNetOutput_mock.return_value = 'enp0s3,enp0s8,lo'
+      result = Facter(config).facterInfo()
+
+    self.assertFalse(setDataIfConfigShortOutput_mock.called)
+    self.assertFalse(setDataIpLinkOutput_mock.called)
+    self.assertEquals(result['interfaces'], 'enp0s3,enp0s8,lo')
 
   @patch("fcntl.ioctl")
   @patch("socket.socket")
@@ -302,6 +368,20 @@ SwapFree:        1598676 kB
     self.assertTrue(get_ip_address_by_ifname_mock.called)
     self.assertEquals(result['netmask'], None)
 
+  @patch.object(FacterLinux, "get_ip_address_by_ifname", new=MagicMock(return_value=None))
+  @patch("ambari_agent.Facter.run_os_command")
+  @patch.object(OSCheck, "get_os_type")
+  @patch.object(OSCheck, "get_os_version")
+  def test_facterSeLinux(self, get_os_version_mock, get_os_type_mock, run_os_command_mock):
+    run_os_command_mock.return_value = (0, "SELinux status:                 enabled\nCurrent mode:                   enforcing", "")
+    get_os_type_mock.return_value = "suse"
+    get_os_version_mock.return_value = "11"
+    config = None
+    result = Facter(config).facterInfo()
+
+    run_os_command_mock.assert_any_call(FacterLinux.GET_SE_LINUX_ST_CMD)
+    self.assertTrue(result['selinux'])
+
   @patch.object(FacterLinux, "get_ip_address_by_ifname", new=MagicMock(return_value=None))
   @patch.object(OSCheck, "get_os_type")
   @patch.object(OSCheck, "get_os_family")
@@ -331,11 +411,59 @@ SwapFree:        1598676 kB
     self.assertEquals(result['operatingsystem'], 'some_type_of_os')
     self.assertEquals(result['osfamily'], 'My_new_family')
 
+  def test_convertSizeToGb(self):
+    # halves are rounded away from zero
+    self.assertEquals(Facter.convertSizeKbToGb(131072), '0.13 GB')
+    self.assertEquals(Facter.convertSizeKbToGb(655360), '0.63 GB')
+    self.assertEquals(Facter.convertSizeKbToGb('1832392'), '1.75 GB')
+    self.assertEquals(Facter.convertSizeMbToGb(128), '0.13 GB')
+    self.assertEquals(Facter.convertSizeMbToGb(2048), '2.00 GB')
+
+  @patch("uuid.getnode")
+  def test_getMacAddress(self, getnode_mock):
+    getnode_mock.return_value = 0x0800270992AB
+    facter = Facter(MagicMock())
+
+    self.assertEquals(facter.getMacAddress(), '08:00:27:09:92:AB')
+    self.assertEquals(facter.getMacAddress(), '08:00:27:09:92:AB')
+    self.assertEquals(1, getnode_mock.call_count)
+
+  @patch("ambari_agent.Facter.run_os_command")
+  @patch.object(platform, "processor")
+  def test_getArchitectureFromLscpu(self, processor_mock, run_os_command_mock):
+    processor_mock.return_value = ''
+    run_os_command_mock.return_value = (0, "Architecture:          x86_64\nCPU op-mode(s):        32-bit, 64-bit", "")
+    facter = Facter(MagicMock())
+
+    self.assertEquals(facter.getArchitecture(), 'x86_64')
+    run_os_command_mock.assert_called_with(Facter.GET_LSCPU_CMD)
+
+    run_os_command_mock.side_effect = OSError()
+    self.assertEquals(facter.getArchitecture(), 'unknown cpu arch')
+
+  @patch("os.popen")
+  @patch("__builtin__.open")
+  def test_facterProcFilesReadDirectly(self, open_mock, popen_mock):
+    file_handle = open_mock.return_value.__enter__.return_value
+    file_handle.read.return_value = "262813.00 123.45"
+
+    self.assertEquals(FacterLinux.setDataUpTimeOutput(), "262813.00 123.45")
+    open_mock.assert_called_with(FacterLinux.PROC_UPTIME_FILE)
+    FacterLinux.setMemInfoOutput()
+    open_mock.assert_called_with(FacterLinux.PROC_MEMINFO_FILE)
+    self.assertFalse(popen_mock.called)
+
+    open_mock.side_effect = IOError()
+    self.assertEquals(FacterLinux.setDataUpTimeOutput(), "")
+    self.assertEquals(FacterLinux.setMemInfoOutput(), "")
+
   @patch("os.path.exists")
   @patch("os.path.isdir")
   @patch("json.loads")
   @patch("glob.glob")
   @patch("__builtin__.open")
+  @patch.object(FacterLinux, "setDataUpTimeOutput", new=MagicMock(return_value=''))
+  @patch.object(FacterLinux, "setMemInfoOutput", new=MagicMock(return_value=''))
   @patch.object(OSCheck, "get_os_type")
   @patch.object(OSCheck, "get_os_version")
   @patch.object(FacterLinux, "resolve_ambari_config")
@@ -443,6 +571,7 @@ SwapFree:        1598676 kB
 @patch.object(platform, "linux_distribution", new=MagicMock(return_value=('Suse', '11', 'Final')))
 @patch.object(socket, "getfqdn", new=MagicMock(return_value="ambari.apache.org"))
 @patch.object(socket, "gethostbyname", new=MagicMock(return_value="192.168.1.1"))
+@patch.object(FacterLinux, "setDataSysClassNetOutput", new=MagicMock(return_value=''))
 @patch.object(FacterLinux, "setDataIfConfigShortOutput", new=MagicMock(return_value=''))
 @patch.object(FacterLinux, "setDataIpLinkOutput", new=MagicMock(return_value='''1: lo: <LOOPBACK,UP,LOWER_UP> mtu 65536 qdisc noqueue state UNKNOWN mode DEFAULT qlen 1
     link/loopback 00:00:00:00:00:00 brd 00:00:00:00:00:00
@@ -481,6 +610,111 @@ class TestHardwareWithoutIfConfig(TestCase):
     self.assertEquals(result['interfaces'], 'lo,enp0s3,enp0s8')
 
 
+@not_for_platform(PLATFORM_WINDOWS)
+class TestFacterSysClassNet(TestCase):
+
+  @patch("__builtin__.open")
+  @patch("os.path.isdir")
+  @patch("os.listdir")
+  def test_setDataSysClassNetOutput(self, listdir_mock, isdir_mock, open_mock):
+    flags = {
+      "/sys/class/net/eth0/flags": "0x1003\n",
+      "/sys/class/net/eth1/flags": "0x1002\n",
+      "/sys/class/net/lo/flags": "0x9\n"
+    }
+
+    def open_side_effect(path):
+      file_mock = MagicMock()
+      file_mock.__enter__.return_value.read.return_value = flags[path]
+      return file_mock
+
+    listdir_mock.return_value = ["lo", "eth1", "bonding_masters", "eth0"]
+    isdir_mock.side_effect = lambda path: not path.endswith("bonding_masters")
+    open_mock.side_effect = open_side_effect
+
+    # bonding_masters is not an interface and eth1 is down
+    self.assertEquals(FacterLinux.setDataSysClassNetOutput(), "eth0,lo")
+    listdir_mock.assert_called_with(FacterLinux.SYS_CLASS_NET_DIR)
+
+  @patch("os.listdir")
+  def test_setDataSysClassNetOutputNoSysfs(self, listdir_mock):
+    listdir_mock.side_effect = OSError()
+
+    self.assertEquals(FacterLinux.setDataSysClassNetOutput(), "")
+
+
+@patch.object(OSCheck, "get_os_family", new=MagicMock(return_value=OSConst.WINSRV_FAMILY))
+@patch.object(OSCheck, "get_os_type", new=MagicMock(return_value="win2012server"))
+@patch.object(OSCheck, "get_os_version", new=MagicMock(return_value="6.3"))
+class TestFacterWindows(TestCase):
+
+  def get_facter(self, powershell_output):
+    with patch("ambari_commons.shell.shellRunner") as shellRunner_mock:
+      shellRunner_mock.return_value.runPowershell.return_value = MagicMock(output=powershell_output)
+      facter = Facter(MagicMock())
+    self.assertTrue(isinstance(facter, FacterWindows))
+    return facter
+
+  @patch.object(FacterWindows, "setDataSystemResourcesKernel32", new=MagicMock(return_value={}))
+  def test_system_resources_page_files(self):
+    memory_and_uptime = "memoryfree=868648\r\nmemorytotal=1832392\r\n{0}uptime_seconds=262813\r\n"
+    samples = [
+      # no page file
+      ("swapsize=0\r\nswapfree=0\r\n", '0', '0'),
+      # one page file
+      ("swapsize=2048\r\nswapfree=1536\r\n", '2048', '1536'),
+      # two page files, summed by the script
+      ("swapsize=6144\r\nswapfree=5120\r\n", '6144', '5120'),
+      # page file values missing, memory and uptime are still reported
+      ("swapsize=\r\n", 0, 0)
+    ]
+
+    for swap_output, swap_size, swap_free in samples:
+      facter = self.get_facter(memory_and_uptime.format(swap_output))
+
+      self.assertEquals(facter.getMemoryFree(), '868648')
+      self.assertEquals(facter.getMemoryTotal(), '1832392')
+      self.assertEquals(facter.getMemorySize(), '1832392')
+      self.assertEquals(facter.getUptimeSeconds(), 262813)
+      self.assertEquals(facter.getSwapSize(), swap_size)
+      self.assertEquals(facter.getSwapFree(), swap_free)
+
+  @patch.object(FacterWindows, "setDataSystemResourcesKernel32", new=MagicMock(return_value={}))
+  def test_system_resources_powershell_failure(self):
+    with patch("ambari_commons.shell.shellRunner") as shellRunner_mock:
+      shellRunner_mock.return_value.runPowershell.side_effect = Exception("powershell failed")
+      facter = Facter(MagicMock())
+
+    self.assertEquals(facter.getMemoryFree(), 0)
+    self.assertEquals(facter.getUptimeSeconds(), 0)
+
+  @patch("ctypes.windll", create=True)
+  def test_system_resources_kernel32(self, windll_mock):
+    def global_memory_status_ex(status_ref):
+      status_ref._obj.ullTotalPhys = 8 * 1024 * 1024 * 1024
+      status_ref._obj.ullAvailPhys = 3 * 1024 * 1024 * 1024 + 1023
+      return 1
+
+    kernel32 = windll_mock.kernel32
+    kernel32.GlobalMemoryStatusEx.side_effect = global_memory_status_ex
+    kernel32.GetTickCount64.return_value = 262813999
+
+    with patch("ambari_commons.shell.shellRunner") as shellRunner_mock:
+      runPowershell_mock = shellRunner_mock.return_value.runPowershell
+      runPowershell_mock.return_value = MagicMock(output="swapsize=2048\r\nswapfree=1536\r\n")
+      facter = Facter(MagicMock())
+
+    # the page files still come from WMI, the PowerShell run is limited to them
+    runPowershell_mock.assert_called_once_with(script_block=FacterWindows.GET_PAGE_FILE_CMD)
+    # kB for the memory, MB for the page files, seconds for the uptime
+    self.assertEquals(facter.getMemoryTotal(), str(8 * 1024 * 1024))
+    self.assertEquals(facter.getMemoryFree(), str(3 * 1024 * 1024))
+    self.assertEquals(facter.getMemorySize(), str(8 * 1024 * 1024))
+    self.assertEquals(facter.getUptimeSeconds(), 262813)
+    self.assertEquals(facter.getSwapSize(), '2048')
+    self.assertEquals(facter.getSwapFree(), '1536')
+
+
 if __name__ == "__main__":
   unittest.main()
 
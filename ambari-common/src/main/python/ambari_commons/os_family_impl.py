@@ -56,8 +56,10 @@ class OsFamilyImpl(object):
     base_cls._impls[self.os_const] = cls
 
     def new(cls, *args, **kwargs):
-      if OSCheck.get_os_family() in cls._impls:
-        os_impl_cls = cls._impls[OSCheck.get_os_family()]
+      # get_os_family() parses the release files, so it is resolved only once per instantiation
+      os_family = OSCheck.get_os_family()
+      if os_family in cls._impls:
+        os_impl_cls = cls._impls[os_family]
       else:
         os_impl_cls = cls._impls[OsFamilyImpl.DEFAULT]
       return object.__new__(os_impl_cls)
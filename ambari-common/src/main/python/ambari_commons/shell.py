@@ -87,9 +87,9 @@ class shellRunnerWindows(shellRunner):
     code = 0
     cmd = None
     if file:
-      cmd = ['powershell', '-WindowStyle', 'Hidden', '-File', file] + args
+      cmd = ['powershell', '-NoProfile', '-NonInteractive', '-WindowStyle', 'Hidden', '-File', file] + args
     elif script_block:
-      cmd = ['powershell', '-WindowStyle', 'Hidden', '-Command', script_block] + args
+      cmd = ['powershell', '-NoProfile', '-NonInteractive', '-WindowStyle', 'Hidden', '-Command', script_block] + args
     p = subprocess.Popen(cmd, stdout=subprocess.PIPE,
                          stderr=subprocess.PIPE, shell=False)
     out, err = p.communicate()